@@ -1,65 +1,218 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from .models import Profile, Environment, Equipment, EnvironmentRequest, EquipmentTransfer
+from .paginators import FasterAdminPaginator, invalidate_cached_counts
+
+
+# tamanho máximo da lista de ids em cada UPDATE ... WHERE id IN (...)
+BULK_UPDATE_BATCH_SIZE = 1000
+
+
+def _locked_update(queryset, **values):
+    """Atualiza as linhas selecionadas sem esperar por linhas bloqueadas.
+
+    Usa SELECT ... FOR UPDATE SKIP LOCKED (ignorado em bancos sem suporte,
+    como o SQLite) dentro de uma transação; linhas em uso por outra transação
+    ficam de fora. Seleções grandes são atualizadas em lotes de
+    BULK_UPDATE_BATCH_SIZE ids. Retorna o número de linhas atualizadas.
+    """
+    manager = queryset.model._base_manager
+    updated = 0
+    with transaction.atomic():
+        ids = list(queryset.select_for_update(skip_locked=True, of=('self',)).values_list('pk', flat=True))
+        for start in range(0, len(ids), BULK_UPDATE_BATCH_SIZE):
+            updated += manager.filter(pk__in=ids[start:start + BULK_UPDATE_BATCH_SIZE]).update(**values)
+    # update() não envia sinais (ex.: ativo muda o total das listagens)
+    invalidate_cached_counts(queryset.model)
+    return updated
+
+
+def _locked_update_action(model_admin, request, queryset, message, **values):
+    """Executa _locked_update em uma ação do admin e informa o resultado.
+
+    A mensagem traz quantas linhas foram alteradas; se SKIP LOCKED deixou
+    linhas de fora, um aviso pede para repetir a ação.
+    """
+    selected = queryset.count()
+    updated = _locked_update(queryset, **values)
+    model_admin.message_user(request, f'{message} ({updated} de {selected}).')
+    if updated < selected:
+        model_admin.message_user(
+            request,
+            f'{selected - updated} registro(s) em uso por outra operação não foram alterados; tente novamente.',
+            messages.WARNING,
+        )
+    return updated
+
+
+class NarrowChangeList(ChangeList):
+    """ChangeList que busca apenas as colunas usadas pela listagem."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only_fields)
+
+
+class NarrowChangeListMixin:
+    """Aplica .only(*list_only_fields) somente no changelist.
+
+    list_only_fields deve cobrir list_display (incluindo os campos usados pelo
+    __str__ das FKs exibidas) e a ordenação; as telas de edição continuam
+    carregando o objeto completo.
+    """
+    list_only_fields = ()
+
+    def get_changelist(self, request, **kwargs):
+        return NarrowChangeList
+
+
+class EnvironmentListFilter(admin.SimpleListFilter):
+    """Filtro por ambiente que lista só os ambientes presentes na queryset.
+
+    O filtro padrão de FK carrega todos os Environment a cada carregamento do
+    changelist; aqui a lista vem da própria tabela filtrada, limitada a
+    max_choices opções.
+    """
+    title = 'ambiente'
+    parameter_name = 'environment'
+    field_name = 'environment'
+    max_choices = 50
+
+    def lookups(self, request, model_admin):
+        name = f'{self.field_name}__name'
+        return (
+            model_admin.get_queryset(request)
+            .filter(**{f'{self.field_name}__isnull': False})
+            .order_by(name)
+            .values_list(f'{self.field_name}_id', name)
+            .distinct()[:self.max_choices]
+        )
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(**{f'{self.field_name}_id': value})
+        return queryset
+
+
+class FromEnvironmentListFilter(EnvironmentListFilter):
+    title = 'ambiente de origem'
+    parameter_name = field_name = 'from_environment'
+
+
+class ToEnvironmentListFilter(EnvironmentListFilter):
+    title = 'ambiente de destino'
+    parameter_name = field_name = 'to_environment'
+
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(NarrowChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'role')
+    # não carrega bio nem as demais colunas de auth_user (password etc.) na listagem
+    list_only_fields = ('role', 'user__username')
     search_fields = ('user__username', 'user__email', 'role')
     list_filter = ('role',)
+    list_select_related = ('user',)
 
 @admin.register(Environment)
-class EnvironmentAdmin(admin.ModelAdmin):
+class EnvironmentAdmin(NarrowChangeListMixin, admin.ModelAdmin):
     list_display = ('name', 'type', 'location', 'capacity', 'status', 'ativo', 'created_by', 'updated_by')
+    # não carrega descricao (TextField) na listagem
+    list_only_fields = ('name', 'type', 'location', 'capacity', 'status', 'ativo', 'created_by__username', 'updated_by__username')
     search_fields = ('name', 'location')
     list_filter = ('type', 'status', 'ativo')
+    list_select_related = ('created_by', 'updated_by')
     actions = ['mark_inactive', 'mark_active']
 
     def mark_inactive(self, request, queryset):
-        queryset.update(ativo=False)
-        self.message_user(request, 'Ambientes marcados como inativos.')
+        _locked_update_action(self, request, queryset, 'Ambientes marcados como inativos', ativo=False, updated_at=timezone.now())
     mark_inactive.short_description = 'Marcar selecionados como inativos'
 
     def mark_active(self, request, queryset):
-        queryset.update(ativo=True)
-        self.message_user(request, 'Ambientes marcados como ativos.')
+        _locked_update_action(self, request, queryset, 'Ambientes marcados como ativos', ativo=True, updated_at=timezone.now())
     mark_active.short_description = 'Marcar selecionados como ativos'
 
 @admin.register(Equipment)
-class EquipmentAdmin(admin.ModelAdmin):
+class EquipmentAdmin(NarrowChangeListMixin, admin.ModelAdmin):
     list_display = ('name', 'brand', 'model', 'serial_number', 'condition', 'environment', 'ativo', 'created_by', 'updated_by')
+    # não carrega observation (TextField) na listagem
+    list_only_fields = (
+        'name', 'brand', 'model', 'serial_number', 'condition', 'ativo',
+        'environment__name', 'environment__type', 'created_by__username', 'updated_by__username',
+    )
     search_fields = ('name', 'brand', 'serial_number')
-    list_filter = ('condition', 'environment', 'ativo')
+    list_filter = ('condition', EnvironmentListFilter, 'ativo')
+    autocomplete_fields = ('environment',)
+    list_select_related = ('environment', 'created_by', 'updated_by')
+    # evita COUNT(*) completo a cada carregamento do changelist
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
     actions = ['mark_inactive', 'mark_active']
 
+    def get_queryset(self, request):
+        # env_name é usado por Equipment.__str__ (ex.: páginas de confirmação de ações)
+        return super().get_queryset(request).annotate(env_name=F('environment__name'))
+
     def mark_inactive(self, request, queryset):
-        queryset.update(ativo=False)
-        self.message_user(request, 'Equipamentos marcados como inativos.')
+        _locked_update_action(self, request, queryset, 'Equipamentos marcados como inativos', ativo=False, updated_at=timezone.now())
     mark_inactive.short_description = 'Marcar selecionados como inativos'
 
     def mark_active(self, request, queryset):
-        queryset.update(ativo=True)
-        self.message_user(request, 'Equipamentos marcados como ativos.')
+        _locked_update_action(self, request, queryset, 'Equipamentos marcados como ativos', ativo=True, updated_at=timezone.now())
     mark_active.short_description = 'Marcar selecionados como ativos'
 
 @admin.register(EquipmentTransfer)
-class EquipmentTransferAdmin(admin.ModelAdmin):
+class EquipmentTransferAdmin(NarrowChangeListMixin, admin.ModelAdmin):
     list_display = ('equipment', 'from_environment', 'to_environment', 'transferred_by', 'transferred_at')
+    # não carrega note (TextField) na listagem; cobre os __str__ de Equipment e Environment
+    list_only_fields = (
+        'transferred_at', 'equipment__name', 'equipment__brand', 'equipment__model',
+        'equipment__environment__name', 'from_environment__name', 'from_environment__type',
+        'to_environment__name', 'to_environment__type', 'transferred_by__username',
+    )
     search_fields = ('equipment__name', 'equipment__serial_number')
-    list_filter = ('from_environment', 'to_environment')
+    list_filter = (FromEnvironmentListFilter, ToEnvironmentListFilter)
+    autocomplete_fields = ('from_environment', 'to_environment')
+    list_select_related = ('equipment', 'from_environment', 'to_environment', 'transferred_by')
+    # evita COUNT(*) completo a cada carregamento do changelist
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Equipment.__str__ acessa environment.name: já traz o ambiente do equipamento no JOIN
+        return super().get_queryset(request).select_related(*self.list_select_related, 'equipment__environment')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # o select de equipamentos renderiza __str__ de cada item; evita uma query por opção
+        if db_field.name == 'equipment':
+            kwargs['queryset'] = Equipment.objects.annotate(env_name=F('environment__name'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 @admin.register(EnvironmentRequest)
-class EnvironmentRequestAdmin(admin.ModelAdmin):
+class EnvironmentRequestAdmin(NarrowChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'environment', 'user', 'status', 'requested_at', 'request_for_date')
-    list_filter = ('status', 'environment')
+    # não carrega note na listagem
+    list_only_fields = ('status', 'requested_at', 'request_for_date', 'environment__name', 'environment__type', 'user__username')
+    list_filter = ('status', EnvironmentListFilter)
+    autocomplete_fields = ('environment',)
+    list_select_related = ('environment', 'user')
+    # evita COUNT(*) completo a cada carregamento do changelist
+    paginator = FasterAdminPaginator
+    show_full_result_count = False
     search_fields = ('user__username', 'environment__name', 'note')
     actions = ['approve_requests', 'reject_requests']
 
+    def get_queryset(self, request):
+        # __str__ usa user e environment; evita queries extras fora do changelist (ex.: ações, exclusão)
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
     def approve_requests(self, request, queryset):
-        queryset.update(status='approved')
-        self.message_user(request, "Pedidos selecionados aprovados.")
+        _locked_update_action(self, request, queryset, 'Pedidos selecionados aprovados', status='approved', updated_at=timezone.now())
     approve_requests.short_description = "Aprovar pedidos selecionados"
 
     def reject_requests(self, request, queryset):
-        queryset.update(status='rejected')
-        self.message_user(request, "Pedidos selecionados rejeitados.")
+        _locked_update_action(self, request, queryset, 'Pedidos selecionados rejeitados', status='rejected', updated_at=timezone.now())
     reject_requests.short_description = "Rejeitar pedidos selecionados"
@@ -0,0 +1,31 @@
+"""Backends de autenticação do app."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileModelBackend(ModelBackend):
+    """ModelBackend que carrega o Profile junto com o usuário da sessão.
+
+    request.user.profile é usado em views e templates (ex.: checagem de papel
+    em environment_request_create e na listagem de ambientes); com o
+    select_related o usuário e o profile vêm em uma única query por request.
+    As permissões continuam memorizadas pelo próprio ModelBackend
+    (_perm_cache) na instância do usuário.
+    """
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # usado por request.auser() em views async (ex.: home)
+        try:
+            user = await UserModel._default_manager.select_related('profile').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
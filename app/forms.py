@@ -1,21 +1,28 @@
 """
 Formulário de registro de usuário.
 
-Define RegisterForm usado na view de cadastro. Valida unicidade do username
-e confirma se as senhas conferem. Os labels e help_text estão em Português
-para facilitar entendimento no template/admin.
+Define RegisterForm usado na view de cadastro. Confirma se as senhas conferem;
+a unicidade do username é verificada pelo banco ao salvar. Os labels e
+help_text estão em Português para facilitar entendimento no template/admin.
 """
+import hashlib
+
 from django import forms
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Environment, Equipment, EnvironmentRequest
+
+# tempo (s) em que um username recusado pelo banco fica memorizado no cache
+USERNAME_TAKEN_CACHE_TIMEOUT = 60
 
-# tente importar modelos do app; se não existirem, continua com None para permitir uso dos forms sem quebrar
-try:
-    from .models import Environment, Equipment, EnvironmentRequest
-except Exception:
-    Environment = None
-    Equipment = None
-    EnvironmentRequest = None
+
+def _username_taken_key(username):
+    # hash evita caracteres inválidos para alguns backends de cache (ex.: espaços)
+    return 'userexists:' + hashlib.md5(username.encode()).hexdigest()
 
 
 class RegisterForm(forms.Form):
@@ -59,12 +66,14 @@ class RegisterForm(forms.Form):
 
     def clean_username(self):
         """
-        Verifica se o username já existe no banco.
+        Rejeita usernames que já falharam por duplicidade há pouco tempo.
 
-        Retorna o username se estiver disponível; caso contrário, lança ValidationError.
+        Não consulta o banco: usa apenas o cache preenchido por save() quando
+        o INSERT viola a restrição unique. Assim, reenvios do mesmo username
+        ocupado não pagam de novo o hash da senha nem o INSERT.
         """
         username = self.cleaned_data.get('username')
-        if username and User.objects.filter(username=username).exists():
+        if username and cache.get(_username_taken_key(username)):
             raise forms.ValidationError('Já existe um usuário com esse username.')
         return username
 
@@ -85,6 +94,10 @@ class RegisterForm(forms.Form):
     def save(self, commit=True):
         """
         Cria e retorna um User a partir dos dados do formulário.
+
+        A unicidade do username é garantida pela restrição unique do banco:
+        não há SELECT prévio; se o INSERT violar a restrição, o erro é
+        associado ao campo username e um ValidationError é lançado.
         """
         data = self.cleaned_data
         user = User(
@@ -93,135 +106,115 @@ class RegisterForm(forms.Form):
         )
         user.set_password(data['password'])
         if commit:
-            user.save()
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
+                cache.set(_username_taken_key(user.username), True, USERNAME_TAKEN_CACHE_TIMEOUT)
+                self.add_error('username', 'Já existe um usuário com esse username.')
+                raise ValidationError('Já existe um usuário com esse username.')
         return user
 
 # Novos formulários para o módulo de Cadastro
-# EnvironmentForm: tenta ser ModelForm se Environment existir; senão usa Form genérico
-if Environment is not None:
-    class EnvironmentForm(forms.ModelForm):
-        class Meta:
-            model = Environment
-            fields = ['name', 'type', 'location', 'capacity', 'status']
-            widgets = {
-                'name': forms.TextInput(attrs={'placeholder': 'Nome do ambiente'}),
-                'location': forms.TextInput(attrs={'placeholder': 'Localização'}),
-            }
-
-        def clean_capacity(self):
-            cap = self.cleaned_data.get('capacity')
-            if cap is not None and cap < 1:
-                raise ValidationError('A capacidade deve ser um número inteiro positivo.')
-            return cap
-
-        def clean_name(self):
-            name = self.cleaned_data.get('name')
-            if name and Environment.objects.filter(name__iexact=name).exclude(pk=getattr(self.instance, 'pk', None)).exists():
-                raise ValidationError('Já existe um ambiente com esse nome.')
-            return name
-else:
-    class EnvironmentForm(forms.Form):
-        TYPE_CHOICES = (
-            ('sala', 'Sala'),
-            ('laboratorio', 'Laboratório'),
-            ('auditorio', 'Auditório'),
-        )
-        STATUS_CHOICES = (
-            ('ativo', 'Ativo'),
-            ('inativo', 'Inativo'),
-            ('em_uso', 'Em uso'),
-        )
+# Os choices vêm dos próprios modelos (ModelForm), sem tuplas duplicadas aqui
+class EnvironmentForm(forms.ModelForm):
+    class Meta:
+        model = Environment
+        fields = ['name', 'type', 'location', 'capacity', 'status']
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'Nome do ambiente'}),
+            'location': forms.TextInput(attrs={'placeholder': 'Localização'}),
+        }
+
+    def clean_capacity(self):
+        # falha rápida com mensagem no campo; o banco garante via env_capacity_positive
+        cap = self.cleaned_data.get('capacity')
+        if cap is not None and cap < 1:
+            raise ValidationError('A capacidade deve ser um número inteiro positivo.')
+        return cap
+
+    def _get_validation_exclusions(self):
+        # name já é checado em clean_name (case-insensitive, inclusive inativos):
+        # evita repetir o SELECT via unique=True e uniq_env_name_ci no validate_unique.
+        # capacity já é checada em clean_capacity: sem o SELECT de env_capacity_positive
+        exclude = super()._get_validation_exclusions()
+        exclude.update({'name', 'capacity'})
+        return exclude
+
+    def clean_name(self):
+        name = self.cleaned_data.get('name')
+        # all_objects: a restrição uniq_env_name_ci também vale para ambientes inativos;
+        # o filtro iexact (UPPER(name)) é atendido pelo índice funcional da restrição
+        if name and Environment.all_objects.filter(name__iexact=name).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise ValidationError('Já existe um ambiente com esse nome.')
+        return name
+
+
+class EquipmentForm(forms.ModelForm):
+    class Meta:
+        model = Equipment
+        fields = ['name', 'brand', 'model', 'serial_number', 'condition', 'environment']
+        widgets = {
+            'name': forms.TextInput(attrs={'placeholder': 'Nome do equipamento'}),
+            'serial_number': forms.TextInput(attrs={'placeholder': 'Número de série'}),
+        }
+
+    def _get_validation_exclusions(self):
+        # serial_number já é checado em clean_serial_number: sem os SELECTs
+        # repetidos de unique=True e uniq_equip_serial_ci no validate_unique
+        exclude = super()._get_validation_exclusions()
+        exclude.add('serial_number')
+        return exclude
+
+    def clean_serial_number(self):
+        serial = self.cleaned_data.get('serial_number')
+        # usa o índice funcional de uniq_equip_serial_ci, inclusive para inativos
+        if serial and Equipment.all_objects.filter(serial_number__iexact=serial).exclude(pk=getattr(self.instance, 'pk', None)).exists():
+            raise ValidationError('Já existe um equipamento com esse número de série.')
+        return serial
 
-        name = forms.CharField(max_length=200, label='Nome')
-        type = forms.ChoiceField(choices=TYPE_CHOICES, label='Tipo')
-        location = forms.CharField(max_length=200, label='Localização', required=False)
-        capacity = forms.IntegerField(min_value=1, label='Capacidade')
-        status = forms.ChoiceField(choices=STATUS_CHOICES, label='Status')
-
-        def clean_capacity(self):
-            cap = self.cleaned_data.get('capacity')
-            if cap is not None and cap < 1:
-                raise ValidationError('A capacidade deve ser um número inteiro positivo.')
-            return cap
-
-        def save(self):
-            """
-            Retorna um dict com os dados; se quiser integrar com models, substituir por ModelForm.
-            """
-            return self.cleaned_data
-
-# EquipmentForm: tenta ser ModelForm se Equipment existir; senão usa Form genérico
-if Equipment is not None:
-    class EquipmentForm(forms.ModelForm):
-        class Meta:
-            model = Equipment
-            fields = ['name', 'brand', 'model', 'serial_number', 'condition', 'environment']
-            widgets = {
-                'name': forms.TextInput(attrs={'placeholder': 'Nome do equipamento'}),
-                'serial_number': forms.TextInput(attrs={'placeholder': 'Número de série'}),
-            }
-
-        def clean_serial_number(self):
-            serial = self.cleaned_data.get('serial_number')
-            if serial and Equipment.objects.filter(serial_number__iexact=serial).exclude(pk=getattr(self.instance, 'pk', None)).exists():
-                raise ValidationError('Já existe um equipamento com esse número de série.')
-            return serial
-else:
-    class EquipmentForm(forms.Form):
-        CONDITION_CHOICES = (
-            ('novo', 'Novo'),
-            ('bom', 'Bom'),
-            ('manutencao', 'Em manutenção'),
-            ('defeito', 'Com defeito'),
-        )
 
-        name = forms.CharField(max_length=200, label='Nome')
-        brand = forms.CharField(max_length=200, label='Marca', required=False)
-        model = forms.CharField(max_length=200, label='Modelo', required=False)
-        serial_number = forms.CharField(max_length=200, label='Número de série', required=False)
-        condition = forms.ChoiceField(choices=CONDITION_CHOICES, label='Condição')
-        environment = forms.CharField(max_length=200, label='Ambiente (nome ou id)', required=False)
+# Novo: formulário para solicitar uso de ambiente
+class EnvironmentRequestForm(forms.ModelForm):
+    class Meta:
+        model = EnvironmentRequest
+        fields = ['request_for_date', 'note']
+        widgets = {
+            'request_for_date': forms.DateInput(attrs={'type': 'date'}),
+            'note': forms.Textarea(attrs={'rows': 3}),
+        }
 
-        def clean_serial_number(self):
-            return self.cleaned_data.get('serial_number')
+    def clean(self):
+        cleaned = super().clean()
+        # validação mínima: data no futuro se fornecida
+        # localdate(): "hoje" no fuso do projeto (TIME_ZONE), não no fuso do servidor
+        d = cleaned.get('request_for_date')
+        if d and d < timezone.localdate():
+            raise ValidationError('A data do pedido deve ser hoje ou futura.')
+        return cleaned
 
-        def save(self):
-            """
-            Retorna um dict com os dados; integrar com models depois.
-            """
-            return self.cleaned_data
+    def save(self, commit=True):
+        """
+        Cria o pedido com um único INSERT dentro de atomic().
 
-# Novo: formulário para solicitar uso de ambiente
-if EnvironmentRequest is not None:
-    class EnvironmentRequestForm(forms.ModelForm):
-        class Meta:
-            model = EnvironmentRequest
-            fields = ['request_for_date', 'note']
-            widgets = {
-                'request_for_date': forms.DateInput(attrs={'type': 'date'}),
-                'note': forms.Textarea(attrs={'rows': 3}),
-            }
-
-        def clean(self):
-            cleaned = super().clean()
-            # validação mínima: data no futuro se fornecida
-            d = cleaned.get('request_for_date')
-            from datetime import date
-            if d and d < date.today():
-                raise ValidationError('A data do pedido deve ser hoje ou futura.')
-            return cleaned
-else:
-    class EnvironmentRequestForm(forms.Form):
-        request_for_date = forms.DateField(required=False, widget=forms.DateInput(attrs={'type':'date'}))
-        note = forms.CharField(required=False, widget=forms.Textarea(attrs={'rows':3}), max_length=500)
-
-        def clean_request_for_date(self):
-            d = self.cleaned_data.get('request_for_date')
-            from datetime import date
-            if d and d < date.today():
-                raise ValidationError('A data do pedido deve ser hoje ou futura.')
-            return d
-
-        def save(self, environment, user):
-            data = self.cleaned_data
-            return {'environment': environment, 'user': user, 'request_for_date': data.get('request_for_date'), 'note': data.get('note','')}
\ No newline at end of file
+        `environment` e `user` devem vir na instância passada ao formulário.
+        Um envio duplicado (já existe pedido pendente, ver uniq_pending_request)
+        não propaga o IntegrityError: retorna o pedido pendente existente e marca
+        `self.duplicate = True`.
+        """
+        req = super().save(commit=False)
+        self.duplicate = False
+        if commit:
+            try:
+                with transaction.atomic():
+                    req.save()
+            except IntegrityError:
+                # só o caminho de erro consulta o banco de novo
+                existing = EnvironmentRequest.objects.filter(
+                    environment=req.environment, user=req.user, status='pending',
+                ).first()
+                if existing is None:
+                    raise
+                self.duplicate = True
+                req = existing
+        return req
@@ -0,0 +1,27 @@
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from app.models import Profile
+
+# usuários lidos (iterator) e gravados (bulk_create) por lote
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    """Cria Profile para usuários que ainda não têm um.
+
+    O sinal post_save só cria Profile na criação do usuário e é ignorado em
+    fixtures (loaddata) e fluxos em lote (_skip_profile_signal); este comando
+    completa os profiles nesses casos, um INSERT por lote de BATCH_SIZE.
+    """
+    help = 'Cria Profile para usuários sem profile.'
+
+    def handle(self, *args, **options):
+        # iterator(): percorre a tabela em blocos, sem carregar todos os usuários na memória
+        users = get_user_model().objects.filter(profile__isnull=True).only('pk').iterator(chunk_size=BATCH_SIZE)
+        created = 0
+        while batch := list(islice(users, BATCH_SIZE)):
+            created += len(Profile.bulk_create_missing(batch))
+        self.stdout.write(self.style.SUCCESS(f'{created} profile(s) criado(s).'))
@@ -0,0 +1,47 @@
+from importlib import import_module
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# sessões lidas (iterator) e regravadas (bulk_update) por lote
+BATCH_SIZE = 2000
+OLD_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class Command(BaseCommand):
+    """Troca o backend gravado nas sessões abertas pelo ModelBackend.
+
+    A sessão guarda o caminho do backend que autenticou o usuário; como
+    ModelBackend saiu de AUTHENTICATION_BACKENDS, essas sessões deixariam de
+    valer (logout). Rode uma vez no deploy: regrava o caminho para o primeiro
+    backend configurado (ProfileModelBackend) sem mudar a expiração.
+    """
+    help = 'Migra sessões autenticadas pelo ModelBackend para o backend atual.'
+
+    def handle(self, *args, **options):
+        new_backend = settings.AUTHENTICATION_BACKENDS[0]
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        # cached_db: a cópia em cache também precisa sair, senão é lida antes do banco
+        session_cache = caches[getattr(settings, 'SESSION_CACHE_ALIAS', 'default')]
+        sessions = Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=BATCH_SIZE)
+        migrated = 0
+        while batch := list(islice(sessions, BATCH_SIZE)):
+            changed = []
+            for session in batch:
+                data = session.get_decoded()
+                if data.get(BACKEND_SESSION_KEY) != OLD_BACKEND:
+                    continue
+                data[BACKEND_SESSION_KEY] = new_backend
+                store = store_class(session.session_key)
+                session.session_data = store.encode(data)
+                changed.append(session)
+                if hasattr(store, 'cache_key'):
+                    session_cache.delete(store.cache_key)
+            Session.objects.bulk_update(changed, ['session_data'])
+            migrated += len(changed)
+        self.stdout.write(self.style.SUCCESS(f'{migrated} sessão(ões) migrada(s) para {new_backend}.'))
@@ -1,35 +1,54 @@
-import threading
+from contextvars import ContextVar
 
-_thread_locals = threading.local()
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# ContextVar em vez de threading.local: isolado por requisição também em views
+# async (ASGI), onde várias requisições compartilham a mesma thread.
+# Guarda o request, não o request.user: o asgiref compara os valores das
+# ContextVars ao trocar de thread, e comparar o SimpleLazyObject do usuário
+# forçaria a consulta dentro do event loop (SynchronousOnlyOperation)
+_current_request = ContextVar('current_request', default=None)
 
 
 def get_current_user():
-    """Retorna o usuário armazenado no thread-local pelo middleware.
+    """Retorna o usuário da requisição registrada pelo middleware.
 
     Pode retornar None se a requisição não tiver usuário autenticado ou
     se o middleware não estiver ativado.
     """
-    return getattr(_thread_locals, 'user', None)
+    return getattr(_current_request.get(), 'user', None)
 
 
 class CurrentUserMiddleware:
-    """Middleware simples que armazena request.user em thread-local.
+    """Middleware simples que disponibiliza request.user via ContextVar.
 
     Adicione este middleware em `MIDDLEWARE` no settings.py, de preferência
     depois da autenticação (ex.: depois de 'django.contrib.auth.middleware.AuthenticationMiddleware').
+    Funciona tanto em WSGI quanto em ASGI.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # guarda user no thread-local para que modelos/sinais possam acessá-lo
-        _thread_locals.user = getattr(request, 'user', None)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # guarda o request no contexto para que modelos/sinais acessem o user
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            # restaura o valor anterior para evitar vazamento entre requests
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
         try:
-            response = self.get_response(request)
-            return response
+            return await self.get_response(request)
         finally:
-            # limpa para evitar vazamento entre requests
-            try:
-                del _thread_locals.user
-            except Exception:
-                pass
+            _current_request.reset(token)
+
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:08
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_alter_profile_photo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='environment',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('name'), name='uniq_env_name_ci', violation_error_message='Já existe um ambiente com esse nome.'),
+        ),
+        migrations.AddConstraint(
+            model_name='equipment',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('serial_number'), name='uniq_equip_serial_ci', violation_error_message='Já existe um equipamento com esse número de série.'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_profiles(apps, schema_editor):
+    """Cria Profile para usuários que ainda não têm um.
+
+    O sinal post_save passou a criar Profile apenas na criação do usuário.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Profile = apps.get_model('app', 'Profile')
+    missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+    Profile.objects.bulk_create(
+        [Profile(user_id=pk) for pk in missing],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_environment_uniq_env_name_ci_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_profiles, migrations.RunPython.noop),
+    ]
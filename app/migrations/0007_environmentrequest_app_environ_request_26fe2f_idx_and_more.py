@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_backfill_profiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='environmentrequest',
+            index=models.Index(fields=['-requested_at'], name='app_environ_request_26fe2f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='environmentrequest',
+            index=models.Index(fields=['status', '-requested_at'], name='app_environ_status_ce4436_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['condition'], name='app_equipme_conditi_a07d85_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['environment'], name='equip_active_env'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role'], name='app_profile_role_b0b914_idx'),
+        ),
+    ]
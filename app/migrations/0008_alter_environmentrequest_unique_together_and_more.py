@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_environmentrequest_app_environ_request_26fe2f_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='environmentrequest',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='environmentrequest',
+            index=models.Index(fields=['user', '-requested_at'], name='app_environ_user_id_6df01d_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='environmentrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('environment', 'user'), name='uniq_pending_request', violation_error_message='Você já tem um pedido pendente para este ambiente.'),
+        ),
+    ]
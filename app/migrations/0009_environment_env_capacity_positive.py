@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_alter_environmentrequest_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='environment',
+            constraint=models.CheckConstraint(condition=models.Q(('capacity__gte', 1), ('capacity__isnull', True), _connector='OR'), name='env_capacity_positive', violation_error_message='A capacidade deve ser um número inteiro positivo.'),
+        ),
+    ]
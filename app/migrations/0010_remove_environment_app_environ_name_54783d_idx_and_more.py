@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_environment_env_capacity_positive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='environment',
+            name='app_environ_name_54783d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipment',
+            name='app_equipme_serial__a56a74_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipment',
+            name='app_equipme_name_b46b37_idx',
+        ),
+        migrations.AddIndex(
+            model_name='environment',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['name'], name='env_name_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['serial_number'], name='eq_serial_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['name'], name='eq_name_active_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_remove_environment_app_environ_name_54783d_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='equipment',
+            name='equip_active_env',
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['environment', 'name'], name='eq_env_active_name_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Índices trigram (pg_trgm) para as buscas __icontains de environment_list e
+# equipment_list. No PostgreSQL o Django gera UPPER("col"::text) LIKE UPPER(%s),
+# então o índice é sobre a mesma expressão. Em outros bancos (ex.: SQLite de
+# desenvolvimento) a migração não faz nada.
+TRIGRAM_INDEXES = (
+    ('env_name_trgm', 'app_environment', 'name'),
+    ('env_location_trgm', 'app_environment', 'location'),
+    ('eq_name_trgm', 'app_equipment', 'name'),
+    ('eq_brand_trgm', 'app_equipment', 'brand'),
+    ('eq_serial_trgm', 'app_equipment', 'serial_number'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_remove_equipment_equip_active_env_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
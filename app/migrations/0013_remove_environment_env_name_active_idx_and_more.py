@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 11:42
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='environment',
+            name='env_name_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='equipment',
+            name='eq_serial_active_idx',
+        ),
+    ]
@@ -4,19 +4,39 @@ Este módulo contém o modelo Profile, que estende informações do usuário
 padrão (settings.AUTH_USER_MODEL). Comentários em Português explicam
 propósito do modelo e dos campos.
 """
-from django.db import models
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models import Q
 from django.conf import settings
-from django.db.models.signals import post_save, pre_save
+from django.db.models.functions import Upper
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from .middleware import get_current_user
+from .paginators import invalidate_cached_counts
 from django.utils import timezone
 
 
 # Helpers: QuerySet/Manager para soft-delete (ativo=True por padrão)
+# tamanho dos lotes de pks em cada UPDATE do soft delete em massa
+SOFT_DELETE_BATCH_SIZE = 1000
+
+
 class SoftDeleteQuerySet(models.QuerySet):
     def delete(self):
-        # soft delete: marca como inativo
-        return super().update(ativo=False, updated_at=timezone.now())
+        # soft delete: marca como inativo, em lotes de pks dentro de uma única transação
+        manager = self.model._base_manager.db_manager(self.db)
+        now = timezone.now()
+        updated = 0
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            for start in range(0, len(ids), SOFT_DELETE_BATCH_SIZE):
+                batch = ids[start:start + SOFT_DELETE_BATCH_SIZE]
+                updated += manager.filter(pk__in=batch).update(ativo=False, updated_at=now)
+        # update() não envia sinais: invalida os totais das listagens aqui
+        invalidate_cached_counts(self.model)
+        return updated
 
     def hard_delete(self):
         return super().delete()
@@ -68,10 +88,30 @@ class Profile(models.Model):
     # armazenar URL da foto de perfil para simplicidade (não requer configuração MEDIA)
     photo = models.URLField(max_length=500, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # filtro por papel no admin (list_filter)
+            models.Index(fields=['role']),
+        ]
+
     def __str__(self):
         """Retorna representação legível do profile (ex.: para admin/logs)."""
         return f"Profile of {self.user.username}"
 
+    @classmethod
+    def bulk_create_missing(cls, users):
+        """Cria, em um único INSERT, os profiles que faltam para `users`.
+
+        Útil em scripts/ações que criam muitos usuários de uma vez (marcando
+        `_skip_profile_signal` nas instâncias para não disparar o sinal).
+        """
+        users = list(users)
+        existing = set(cls.objects.filter(user__in=users).values_list('user_id', flat=True))
+        return cls.objects.bulk_create(
+            [cls(user=u) for u in users if u.pk not in existing],
+            ignore_conflicts=True,
+        )
+
 # Novos modelos: Environment e Equipment
 class Environment(models.Model):
     TYPE_CHOICES = (
@@ -114,8 +154,21 @@ class Environment(models.Model):
 
     class Meta:
         ordering = ['name']
-        indexes = [
-            models.Index(fields=['name']),
+        # name já tem o índice do unique=True (busca/ordenação) e o funcional de
+        # uniq_env_name_ci (iexact): sem índice extra
+        constraints = [
+            # índice funcional: a checagem name__iexact do formulário usa UPPER(name)
+            models.UniqueConstraint(
+                Upper('name'),
+                name='uniq_env_name_ci',
+                violation_error_message='Já existe um ambiente com esse nome.',
+            ),
+            # vale também para update()/SQL direto, que não passam pelo formulário
+            models.CheckConstraint(
+                condition=Q(capacity__gte=1) | Q(capacity__isnull=True),
+                name='env_capacity_positive',
+                violation_error_message='A capacidade deve ser um número inteiro positivo.',
+            ),
         ]
 
     def __str__(self):
@@ -160,12 +213,28 @@ class Equipment(models.Model):
     class Meta:
         ordering = ['name']
         indexes = [
-            models.Index(fields=['serial_number']),
-            models.Index(fields=['name']),
+            # parcial: SoftDeleteManager sempre filtra ativo=True (serial_number já é
+            # coberto pelo índice do unique=True e pelo funcional de uniq_equip_serial_ci)
+            models.Index(fields=['name'], condition=Q(ativo=True), name='eq_name_active_idx'),
+            models.Index(fields=['condition']),
+            # ativo é booleano (baixa cardinalidade): índice parcial só com os ativos;
+            # (environment, name) cobre env.equipments filtrado e ordenado por nome
+            models.Index(fields=['environment', 'name'], condition=Q(ativo=True), name='eq_env_active_name_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                Upper('serial_number'),
+                name='uniq_equip_serial_ci',
+                violation_error_message='Já existe um equipamento com esse número de série.',
+            ),
         ]
 
     def __str__(self):
-        env = f" in {self.environment.name}" if self.environment else ""
+        # usa env_name quando anotado na queryset (ex.: admin), sem carregar o ambiente
+        env_name = getattr(self, 'env_name', None)
+        if env_name is None and self.environment_id:
+            env_name = self.environment.name
+        env = f" in {env_name}" if env_name else ""
         return f"{self.name} ({self.brand} {self.model}){env}"
 
 
@@ -206,40 +275,92 @@ class EnvironmentRequest(models.Model):
 
     class Meta:
         ordering = ['-requested_at']
-        unique_together = (('environment', 'user', 'status'),)  # simples: evita duplicação de chaves idênticas; lógica adicional em view
+        indexes = [
+            models.Index(fields=['-requested_at']),
+            models.Index(fields=['status', '-requested_at']),
+            # histórico de pedidos por usuário (user.environment_requests)
+            models.Index(fields=['user', '-requested_at']),
+        ]
+        constraints = [
+            # no máximo um pedido pendente por usuário/ambiente; aprovados e
+            # rejeitados podem se repetir (índice parcial, menor que o composto com status)
+            models.UniqueConstraint(
+                fields=['environment', 'user'],
+                condition=Q(status='pending'),
+                name='uniq_pending_request',
+                violation_error_message='Você já tem um pedido pendente para este ambiente.',
+            ),
+        ]
 
     def __str__(self):
         return f"Request {self.pk} by {self.user} for {self.environment} ({self.status})"
 
 
+# Desliga o registro de transferências no contexto atual (importações/atualizações
+# em lote), evitando o SELECT extra do pre_save em cada Equipment.save()
+_skip_transfer_checks = ContextVar('skip_transfer_checks', default=False)
+
+
+@contextmanager
+def skip_transfer_check():
+    token = _skip_transfer_checks.set(True)
+    try:
+        yield
+    finally:
+        _skip_transfer_checks.reset(token)
+
+
 # Sinal: ao alterar environment de um equipamento, registra transferência
 @receiver(pre_save, sender=Equipment)
 def _create_transfer_on_env_change(sender, instance, **kwargs):
+    # descarta transferência de um save anterior que falhou antes do post_save
+    instance.__dict__.pop('_pending_transfer', None)
     if not instance.pk:
         # criação — não é uma transferência
         return
-    try:
-        # usa all_objects para acessar mesmo se registro estiver inativo
-        old = Equipment.all_objects.get(pk=instance.pk)
-    except Equipment.DoesNotExist:
+    if getattr(instance, '_skip_transfer_check', False) or _skip_transfer_checks.get():
         return
-    # se houve mudança de ambiente, cria registro de transferência
-    if (old.environment_id or None) != (instance.environment_id or None):
-        EquipmentTransfer.objects.create(
+    # busca só o environment_id atual (não a linha inteira); all_objects inclui inativos
+    old_env_ids = list(Equipment.all_objects.filter(pk=instance.pk).values_list('environment_id', flat=True)[:1])
+    if not old_env_ids:
+        return
+    # se houve mudança de ambiente, prepara o registro de transferência; o INSERT
+    # fica para o post_save, depois que o UPDATE do equipamento der certo
+    if (old_env_ids[0] or None) != (instance.environment_id or None):
+        instance._pending_transfer = EquipmentTransfer(
             equipment=instance,
-            from_environment=old.environment,
-            to_environment=instance.environment,
+            from_environment_id=old_env_ids[0],
+            to_environment_id=instance.environment_id,
             transferred_by=get_current_user()
         )
 
-# Sinal para criar/atualizar Profile ao criar/atualizar User
+
+@receiver(post_save, sender=Equipment)
+def _save_pending_transfer(sender, instance, **kwargs):
+    transfer = instance.__dict__.pop('_pending_transfer', None)
+    if transfer is not None:
+        # mesma transação do save: dentro de atomic(), desfeito junto com ele
+        transfer.save()
+
+
+# Sinal: escritas em ambientes/equipamentos invalidam os totais cacheados
+# pelas listagens (CachedCountPaginator)
+@receiver([post_save, post_delete], sender=Environment)
+@receiver([post_save, post_delete], sender=Equipment)
+def _invalidate_list_counts(sender, **kwargs):
+    invalidate_cached_counts(sender)
+
+# Sinal para criar Profile ao criar User
+# (atualizações de User, como last_login, não consultam Profile; usuários antigos
+# sem profile foram preenchidos pela migração 0006_backfill_profiles)
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
+    # fixtures (raw) e fluxos em lote (Profile.bulk_create_missing) não passam pelo sinal
+    if kwargs.get('raw') or getattr(instance, '_skip_profile_signal', False):
+        return
     if created:
-        Profile.objects.create(user=instance)
-    else:
-        # garante que exista profile; update sem tocar campos customizados
-        Profile.objects.get_or_create(user=instance)
+        # ON CONFLICT DO NOTHING: se outro fluxo já criou o profile, não há IntegrityError
+        Profile.objects.bulk_create([Profile(user=instance)], ignore_conflicts=True)
 
 
 
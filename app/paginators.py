@@ -0,0 +1,107 @@
+"""Paginadores usados pelo app.
+
+FasterAdminPaginator evita o SELECT COUNT(*) completo nas listagens do admin
+quando a tabela é grande e nenhum filtro (além do manager padrão) foi aplicado.
+CachedCountPaginator memoriza por alguns segundos o COUNT(*) das listagens
+paginadas das views, invalidado a cada escrita no modelo.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class FasterAdminPaginator(Paginator):
+    """Paginator que usa estimativas do PostgreSQL em vez do COUNT(*) exato.
+
+    A estimativa só é usada quando a queryset não tem filtros além dos do
+    manager padrão do modelo (ex.: ativo=True do SoftDeleteManager) e o total
+    estimado é de pelo menos ESTIMATE_THRESHOLD linhas. Sem WHERE nenhum usa
+    pg_class.reltuples; com o filtro do manager, a estimativa de linhas do
+    planejador (EXPLAIN), que já considera esse filtro. Nos demais casos (ou em
+    outros bancos, como o SQLite de desenvolvimento) faz a contagem exata.
+    """
+    ESTIMATE_THRESHOLD = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and self._has_only_base_filter(query):
+            connection = connections[self.object_list.db]
+            if connection.vendor == 'postgresql':
+                estimate = self._estimate(connection, query)
+                if estimate is not None and estimate >= self.ESTIMATE_THRESHOLD:
+                    return estimate
+        return super().count
+
+    @staticmethod
+    def _has_only_base_filter(query):
+        # sem WHERE, ou WHERE igual ao do manager padrão: nenhum filtro/busca do changelist
+        return not query.where or query.where == query.model._default_manager.all().query.where
+
+    def _estimate(self, connection, query):
+        with connection.cursor() as cursor:
+            if not query.where:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [query.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row else None
+            sql, params = query.get_compiler(using=self.object_list.db).as_sql()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _count_version_key(model):
+    return f'paginator-count-version:{model._meta.label_lower}'
+
+
+def invalidate_cached_counts(model):
+    """Invalida os totais de CachedCountPaginator das listagens de `model`.
+
+    Chamado nas escritas do modelo (sinais post_save/post_delete, soft delete
+    em massa, ações do admin): troca a versão que compõe a chave do cache.
+    """
+    key = _count_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # versão expulsa do cache: recomeça de um valor que não repete os anteriores
+        cache.set(key, time.time_ns(), None)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator que guarda o total de itens no cache por COUNT_CACHE_TIMEOUT s.
+
+    A chave é derivada do SQL da queryset (filtros de busca incluídos), então
+    cada combinação de filtros tem seu próprio total, e da versão do modelo:
+    qualquer escrita (invalidate_cached_counts) descarta os totais guardados,
+    para que um item recém-criado apareça na listagem.
+    """
+    COUNT_CACHE_TIMEOUT = 30
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        try:
+            sql = str(query)
+        except EmptyResultSet:
+            return 0
+        version = cache.get_or_set(_count_version_key(query.model), time.time_ns, None)
+        key = f'paginator-count:{self.object_list.db}:{version}:' + hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.COUNT_CACHE_TIMEOUT)
+        return count
@@ -1,3 +1,234 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .forms import EnvironmentRequestForm, RegisterForm
+from .models import Environment, Equipment, EnvironmentRequest, EquipmentTransfer, skip_transfer_check
+from .paginators import CachedCountPaginator, FasterAdminPaginator
+
+
+class CachedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Environment.objects.create(name=f'Env{i}', type='sala')
+
+    def test_count_is_cached(self):
+        self.assertEqual(CachedCountPaginator(Environment.objects.all(), 10).count, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedCountPaginator(Environment.objects.all(), 10).count, 3)
+
+    def test_create_invalidates_count(self):
+        CachedCountPaginator(Environment.objects.all(), 10).count
+        Environment.objects.create(name='Zeta', type='sala')
+        self.assertEqual(CachedCountPaginator(Environment.objects.all(), 10).count, 4)
+
+    def test_soft_delete_invalidates_count(self):
+        CachedCountPaginator(Environment.objects.all(), 10).count
+        Environment.objects.filter(name='Env0').delete()
+        self.assertEqual(CachedCountPaginator(Environment.objects.all(), 10).count, 2)
+
+    def test_new_item_is_listed(self):
+        # o total cacheado limita o slice da página: o item novo precisa aparecer
+        user = User.objects.create_user('u', password='x')
+        self.client.force_login(user)
+        self.client.get('/environments/')
+        Environment.objects.create(name='Zeta', type='sala')
+        response = self.client.get('/environments/')
+        names = [env.name for env in response.context['page_obj']]
+        self.assertIn('Zeta', names)
+
+
+class EnvironmentRequestFormTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('u', password='x')
+        # a view só aceita pedidos para ambientes com status 'ativo'
+        self.env = Environment.objects.create(name='Lab', type='sala', status='ativo')
+
+    def _form(self, note='primeiro'):
+        return EnvironmentRequestForm(
+            {'note': note},
+            instance=EnvironmentRequest(environment=self.env, user=self.user, status='pending'),
+        )
+
+    def test_save_creates_request_with_single_insert(self):
+        form = self._form()
+        self.assertTrue(form.is_valid())
+        with CaptureQueriesContext(connection) as ctx:
+            req = form.save()
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertFalse(form.duplicate)
+        self.assertIsNotNone(req.pk)
+
+    def test_duplicate_pending_request(self):
+        first = self._form()
+        first.is_valid()
+        original = first.save()
+        second = self._form(note='segundo')
+        self.assertTrue(second.is_valid())
+        req = second.save()
+        self.assertTrue(second.duplicate)
+        self.assertEqual(req.pk, original.pk)
+        self.assertEqual(EnvironmentRequest.objects.count(), 1)
+
+    def test_get_with_pending_request_redirects(self):
+        EnvironmentRequest.objects.create(environment=self.env, user=self.user, status='pending')
+        self.client.force_login(self.user)
+        response = self.client.get(f'/environments/{self.env.pk}/request/')
+        self.assertRedirects(response, f'/environments/{self.env.pk}/', fetch_redirect_response=False)
+
+    def test_get_without_pending_request_shows_form(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f'/environments/{self.env.pk}/request/')
+        self.assertEqual(response.status_code, 200)
+
+
+class EquipmentListTests(TestCase):
+    def test_list_query_does_not_join_environment(self):
+        env = Environment.objects.create(name='Lab', type='sala')
+        Equipment.objects.create(name='PC', serial_number='S1', environment=env)
+        self.client.force_login(User.objects.create_user('u', password='x'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/equipments/?environment={env.pk}')
+        self.assertContains(response, 'PC')
+        listing = [q['sql'] for q in ctx.captured_queries if 'FROM "app_equipment"' in q['sql'] and 'COUNT' not in q['sql']]
+        self.assertEqual(len(listing), 1)
+        self.assertNotIn('app_environment', listing[0])
+
+
+class EquipmentTransferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('u', password='x', is_staff=True, is_superuser=True)
+        self.env_a = Environment.objects.create(name='A', type='sala')
+        self.env_b = Environment.objects.create(name='B', type='sala')
+        self.equipment = Equipment.objects.create(name='PC', serial_number='S1', environment=self.env_a)
+
+    def _edit_data(self):
+        return {
+            'name': 'PC', 'brand': '', 'model': '', 'serial_number': 'S1',
+            'condition': self.equipment.condition, 'environment': self.env_b.pk,
+        }
+
+    def test_environment_change_records_transfer(self):
+        self.equipment.environment = self.env_b
+        self.equipment.save()
+        transfer = EquipmentTransfer.objects.get()
+        self.assertEqual((transfer.from_environment, transfer.to_environment), (self.env_a, self.env_b))
+
+    def test_save_without_change_records_nothing(self):
+        self.equipment.name = 'PC novo'
+        self.equipment.save()
+        self.assertFalse(EquipmentTransfer.objects.exists())
+
+    def test_rolled_back_save_records_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.equipment.environment = self.env_b
+                self.equipment.save()
+                raise RuntimeError
+        self.assertEqual(Equipment.objects.get().environment, self.env_a)
+        self.assertFalse(EquipmentTransfer.objects.exists())
+
+    def test_skip_transfer_check(self):
+        with skip_transfer_check():
+            self.equipment.environment = self.env_b
+            self.equipment.save()
+        self.assertFalse(EquipmentTransfer.objects.exists())
+
+    def test_edit_view_records_transfer_with_user(self):
+        self.client.force_login(self.user)
+        response = self.client.post(f'/equipments/{self.equipment.pk}/edit/', self._edit_data())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(EquipmentTransfer.objects.get().transferred_by, self.user)
+
+    async def test_edit_view_records_transfer_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(f'/equipments/{self.equipment.pk}/edit/', self._edit_data())
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(await EquipmentTransfer.objects.acount(), 1)
+
+
+class RegisterFormTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _data(self, username='novo'):
+        return {'username': username, 'email': '', 'password': 'Senha-123', 'password_confirm': 'Senha-123'}
+
+    def test_save_creates_user_and_profile(self):
+        form = RegisterForm(self._data())
+        self.assertTrue(form.is_valid())
+        user = form.save()
+        self.assertTrue(user.check_password('Senha-123'))
+        self.assertTrue(hasattr(User.objects.get(pk=user.pk), 'profile'))
+
+    def test_duplicate_username_becomes_field_error(self):
+        User.objects.create_user('novo', password='x')
+        form = RegisterForm(self._data())
+        self.assertTrue(form.is_valid())
+        with self.assertRaises(ValidationError):
+            form.save()
+        self.assertIn('username', form.errors)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_rejected_username_is_remembered_without_queries(self):
+        User.objects.create_user('novo', password='x')
+        form = RegisterForm(self._data())
+        form.is_valid()
+        with self.assertRaises(ValidationError):
+            form.save()
+        retry = RegisterForm(self._data())
+        with self.assertNumQueries(0):
+            self.assertFalse(retry.is_valid())
+        self.assertIn('username', retry.errors)
+
+    def test_register_view_reports_duplicate(self):
+        User.objects.create_user('novo', password='x')
+        response = self.client.post('/register/', self._data())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('username', response.context['form'].errors)
+
+
+class FasterAdminPaginatorTests(TestCase):
+    def setUp(self):
+        Equipment.objects.create(name='PC', serial_number='S1')
+        Equipment.all_objects.create(name='Velho', serial_number='S2', ativo=False)
+
+    def test_base_manager_filter_counts_as_unfiltered(self):
+        # SoftDeleteManager sempre filtra ativo=True: isso não é filtro do changelist
+        self.assertTrue(FasterAdminPaginator._has_only_base_filter(Equipment.objects.all().query))
+        self.assertTrue(FasterAdminPaginator._has_only_base_filter(EquipmentTransfer.objects.all().query))
+        self.assertFalse(FasterAdminPaginator._has_only_base_filter(Equipment.objects.filter(name='PC').query))
+
+    def test_exact_count_outside_postgresql(self):
+        self.assertEqual(FasterAdminPaginator(Equipment.objects.all(), 10).count, 1)
+
+    def test_estimate_used_only_without_changelist_filters(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(FasterAdminPaginator, '_estimate', return_value=50000) as estimate:
+            self.assertEqual(FasterAdminPaginator(Equipment.objects.all(), 10).count, 50000)
+            self.assertEqual(FasterAdminPaginator(Equipment.objects.filter(name='PC'), 10).count, 1)
+        estimate.assert_called_once()
+
+    def test_small_estimate_falls_back_to_exact_count(self):
+        with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                mock.patch.object(FasterAdminPaginator, '_estimate', return_value=5):
+            self.assertEqual(FasterAdminPaginator(Equipment.objects.all(), 10).count, 1)
+
 
-# Create your tests here.
+class MigrateSessionBackendTests(TestCase):
+    def test_old_session_stays_logged_in(self):
+        user = User.objects.create_user('u', password='x')
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        call_command('migrate_session_backend', stdout=StringIO())
+        self.assertEqual(self.client.session['_auth_user_backend'], 'app.backends.ProfileModelBackend')
+        response = self.client.get('/environments/')
+        self.assertEqual(response.status_code, 200)
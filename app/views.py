@@ -6,44 +6,103 @@ Explicação rápida:
 - register: processa GET e POST do formulário de registro.
   - Em GET: exibe formulário vazio.
   - Em POST: valida o formulário; se válido, cria um User e um Profile associado,
-    emite mensagens (sucesso/erro) e redireciona para 'home'.
+    emite mensagens (sucesso/erro) e redireciona para 'environment_list'.
 """
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseRedirect
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth import authenticate, login
-from django.db import IntegrityError
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.contrib.auth import login
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_http_methods
 
 from .forms import RegisterForm, EnvironmentForm, EquipmentForm, EnvironmentRequestForm
-from .models import Profile, Environment, Equipment, EnvironmentRequest
+from .models import Environment, Equipment, EnvironmentRequest
+from .paginators import CachedCountPaginator
+
+# Colunas carregadas nas listagens paginadas (evita trazer descricao/observation)
+ENVIRONMENT_LIST_FIELDS = ('id', 'name', 'type', 'location', 'capacity', 'status')
+# equipment_list usa .values(): o template recebe dicts, sem instanciar modelos
+# (só as colunas exibidas por equipment_list.html: sem JOIN com app_environment)
+EQUIPMENT_LIST_FIELDS = ('id', 'name', 'brand', 'model', 'serial_number')
+
+# index.html só muda entre visitante anônimo e usuário logado (navbar);
+# a versão anônima é igual para todos e fica no cache
+HOME_ANONYMOUS_CACHE_KEY = 'home:anonymous'
+HOME_CACHE_TIMEOUT = 60 * 15
+
+# destino após o cadastro; reverse_lazy permite defini-lo no import do módulo
+REGISTER_SUCCESS_URL = reverse_lazy('environment_list')
+
+# views de formulário/confirmação: outros métodos recebem 405 antes do corpo da view
+require_get_or_post = require_http_methods(['GET', 'POST'])
 
 # Create your views here.
 
-def home(request):
+# conteúdo depende do usuário logado: proxies/CDN não devem guardar a resposta
+@cache_control(private=True)
+async def home(request):
     """
-    Renderiza a página inicial.
+    Renderiza a página inicial (view async).
 
     Parâmetros:
     - request: HttpRequest recebido pelo Django.
 
+    Para visitantes anônimos o HTML renderizado é reaproveitado do cache
+    por HOME_CACHE_TIMEOUT segundos.
+
     Retorna:
     - HttpResponse com o template 'index.html'.
     """
-    return render(request, 'index.html')
-
+    # auser() carrega o usuário sem bloquear; ele vai explícito no contexto
+    # para o template não avaliar o request.user lazy (consulta síncrona)
+    user = await request.auser()
+    if user.is_authenticated:
+        # página personalizada (nome do usuário): renderiza sempre
+        return render(request, 'index.html', {'user': user})
+    content = await cache.aget(HOME_ANONYMOUS_CACHE_KEY)
+    if content is None:
+        content = render_to_string('index.html', {'user': user}, request=request)
+        await cache.aset(HOME_ANONYMOUS_CACHE_KEY, content, HOME_CACHE_TIMEOUT)
+    return HttpResponse(content)
+
+
+def _create_user_and_login(request, form):
+    """
+    Cria o usuário (RegisterForm.save()) e faz o login em uma única transação.
 
-def register(request):
+    Síncrono: o hash da senha e as escritas no banco rodam aqui, chamado por
+    register() via sync_to_async.
+    """
+    # User, Profile (sinal) e last_login do login em um único COMMIT
+    with transaction.atomic():
+        # Cria o usuário com as credenciais fornecidas
+        user = form.save()
+        # loga o usuário recém-criado direto, sem authenticate(): a senha
+        # acabou de ser definida e um novo PBKDF2 só dobraria o custo
+        login(request, user, backend='app.backends.ProfileModelBackend')
+    return user
+
+
+@require_get_or_post
+async def register(request):
     """
-    View para cadastro de novo usuário utilizando RegisterForm.save()
+    View (async) para cadastro de novo usuário utilizando RegisterForm.save()
     (sinal de Profile cuidará da criação do Profile associado).
+    O trabalho síncrono fica em _create_user_and_login().
 
     Fluxo:
     - Se método for POST:
         - Instancia RegisterForm com os dados do POST.
         - Se o formulário for válido, cria um usuário e emite mensagens de sucesso.
-        - Em caso de exceção (IntegrityError ou genérica), registra mensagem de erro.
+        - Em caso de username duplicado (ValidationError), registra mensagem de erro.
       Se o formulário não for válido, adiciona mensagem de erro pedindo correção.
     - Se método for GET:
         - Instancia um formulário vazio e renderiza o template de registro.
@@ -56,23 +115,18 @@ def register(request):
         form = RegisterForm(request.POST)
         if form.is_valid():
             try:
-                # Cria o usuário com as credenciais fornecidas
-                user = form.save()
-                # autentica e loga o usuário automaticamente para evitar redirecionamento ao login
-                raw_password = form.cleaned_data.get('password')
-                user = authenticate(request, username=user.username, password=raw_password)
-                if user is not None:
-                    login(request, user)
+                # PBKDF2 e INSERTs fora do event loop: em ASGI o worker segue
+                # atendendo outras requisições enquanto a senha é calculada
+                await sync_to_async(_create_user_and_login)(request, form)
                 # Mensagem exibida no template (alert bootstrap)
                 messages.success(request, 'Usuário criado e autenticado com sucesso.')
                 # redireciona para listagem de ambientes após cadastro
-                return redirect('environment_list')
-            except IntegrityError as e:
-                # Erro específico para dados duplicados (ex: username já existe)
-                messages.error(request, f'Erro ao criar usuário (dados duplicados): {e}')
-            except Exception as e:
-                # Captura qualquer erro durante a criação e informa ao usuário
-                messages.error(request, f'Erro ao criar usuário: {e}')
+                return HttpResponseRedirect(REGISTER_SUCCESS_URL)
+            except ValidationError:
+                # username duplicado detectado pelo banco (RegisterForm.save() converte o
+                # IntegrityError); o erro já está associado ao campo. Outros erros
+                # não são engolidos aqui e chegam ao log/500
+                messages.error(request, 'Corrija os erros no formulário abaixo.')
         else:
             # Formulário inválido: informa o usuário para corrigir erros
             messages.error(request, 'Corrija os erros no formulário abaixo.')
@@ -99,8 +153,12 @@ def environment_list(request):
     - HttpResponse com o template 'environment_list.html'.
     """
     q = request.GET.get('q', '')
-    queryset = Environment.objects.all()
+    # contagem de equipamentos ativos na mesma query (evita um COUNT por ambiente)
+    queryset = Environment.objects.annotate(
+        eq_count=Count('equipments', filter=Q(equipments__ativo=True))
+    )
     if q:
+        # no PostgreSQL, atendido pelos índices trigram da migração 0012
         queryset = queryset.filter(Q(name__icontains=q) | Q(location__icontains=q))
     type_filter = request.GET.get('type')
     if type_filter:
@@ -108,8 +166,10 @@ def environment_list(request):
     status_filter = request.GET.get('status')
     if status_filter:
         queryset = queryset.filter(status=status_filter)
+    # order_by explícito: com GROUP BY o Meta.ordering não é aplicado
+    queryset = queryset.only(*ENVIRONMENT_LIST_FIELDS).order_by('name')
 
-    paginator = Paginator(queryset, 10)
+    paginator = CachedCountPaginator(queryset, 10)
     page_obj = paginator.get_page(request.GET.get('page'))
     # alterado: usa template fornecido enviroments.html (arquivo existente)
     return render(request, 'enviroments.html', {'page_obj': page_obj, 'q': q})
@@ -128,7 +188,9 @@ def environment_detail(request, pk):
     - HttpResponse com o template 'environment_detail.html'.
     """
     env = get_object_or_404(Environment, pk=pk)
-    equipments = env.equipments.select_related('environment').all()
+    # o ambiente já está carregado: sem JOIN de volta em environment, só as colunas exibidas
+    # (environment_id é usado pelo related manager para reaproveitar `env` em eq.environment)
+    equipments = env.equipments.only('id', 'name', 'brand', 'model', 'condition', 'environment_id')
     return render(request, 'environment_detail.html', {'environment': env, 'equipments': equipments})
 
 
@@ -151,12 +213,7 @@ def environment_create(request):
     if request.method == 'POST':
         form = EnvironmentForm(request.POST)
         if form.is_valid():
-            saved = form.save()
-            # form.save() pode retornar instância do modelo ou dict (compatibilidade)
-            if isinstance(saved, dict):
-                env = Environment.objects.create(**saved)
-            else:
-                env = saved
+            env = form.save()
             messages.success(request, 'Ambiente criado com sucesso.')
             return redirect('environment_detail', pk=env.pk)
         else:
@@ -184,25 +241,19 @@ def environment_update(request, pk):
         return redirect('environment_detail', pk=pk)
 
     if request.method == 'POST':
-        form = EnvironmentForm(request.POST, instance=env) if hasattr(Environment, 'objects') else EnvironmentForm(request.POST)
+        form = EnvironmentForm(request.POST, instance=env)
         if form.is_valid():
-            saved = form.save()
-            if isinstance(saved, dict):
-                for k, v in saved.items():
-                    setattr(env, k, v)
-                env.save()
+            form.save()
             messages.success(request, 'Ambiente atualizado com sucesso.')
             return redirect('environment_detail', pk=env.pk)
         else:
             messages.error(request, 'Corrija os erros no formulário.')
     else:
-        form = EnvironmentForm(instance=env) if hasattr(Environment, 'objects') else EnvironmentForm(initial={
-            'name': env.name, 'type': env.type, 'location': env.location,
-            'capacity': env.capacity, 'status': env.status
-        })
+        form = EnvironmentForm(instance=env)
     return render(request, 'environment_form.html', {'form': form, 'environment': env})
 
 
+@require_get_or_post
 @login_required
 def environment_delete(request, pk):
     """
@@ -242,14 +293,16 @@ def equipment_list(request):
     - HttpResponse com o template 'equipment_list.html'.
     """
     q = request.GET.get('q', '')
-    queryset = Equipment.objects.select_related('environment').all()
+    queryset = Equipment.objects.all()
     if q:
+        # no PostgreSQL, atendido pelos índices trigram da migração 0012
         queryset = queryset.filter(Q(name__icontains=q) | Q(brand__icontains=q) | Q(serial_number__icontains=q))
     env_filter = request.GET.get('environment')
     if env_filter:
         queryset = queryset.filter(environment__id=env_filter)
+    queryset = queryset.values(*EQUIPMENT_LIST_FIELDS)
 
-    paginator = Paginator(queryset, 10)
+    paginator = CachedCountPaginator(queryset, 10)
     page_obj = paginator.get_page(request.GET.get('page'))
     return render(request, 'equipment_list.html', {'page_obj': page_obj, 'q': q})
 
@@ -266,7 +319,8 @@ def equipment_detail(request, pk):
     Retorna:
     - HttpResponse com o template 'equipment_detail.html'.
     """
-    eq = get_object_or_404(Equipment, pk=pk)
+    # o template exibe o ambiente: carrega no mesmo SELECT
+    eq = get_object_or_404(Equipment.objects.select_related('environment'), pk=pk)
     return render(request, 'equipment_detail.html', {'equipment': eq})
 
 
@@ -288,19 +342,8 @@ def equipment_create(request):
     if request.method == 'POST':
         form = EquipmentForm(request.POST)
         if form.is_valid():
-            saved = form.save()
-            if isinstance(saved, dict):
-                # tenta associar ambiente se informado como id ou nome
-                env_val = saved.pop('environment', None)
-                if env_val:
-                    try:
-                        env = Environment.objects.get(pk=int(env_val))
-                    except Exception:
-                        env = Environment.objects.filter(name__iexact=str(env_val)).first()
-                    saved['environment'] = env
-                eq = Equipment.objects.create(**saved)
-            else:
-                eq = saved
+            # o ambiente já vem resolvido pelo ModelChoiceField (uma única busca por pk)
+            eq = form.save()
             messages.success(request, 'Equipamento criado com sucesso.')
             return redirect('equipment_detail', pk=eq.pk)
         else:
@@ -328,34 +371,19 @@ def equipment_update(request, pk):
         return redirect('equipment_detail', pk=pk)
 
     if request.method == 'POST':
-        form = EquipmentForm(request.POST, instance=eq) if hasattr(Equipment, 'objects') else EquipmentForm(request.POST)
+        form = EquipmentForm(request.POST, instance=eq)
         if form.is_valid():
-            saved = form.save()
-            if isinstance(saved, dict):
-                # atualiza campos simples
-                env_val = saved.pop('environment', None)
-                for k, v in saved.items():
-                    setattr(eq, k, v)
-                if env_val:
-                    try:
-                        env = Environment.objects.get(pk=int(env_val))
-                    except Exception:
-                        env = Environment.objects.filter(name__iexact=str(env_val)).first()
-                    eq.environment = env
-                eq.save()
+            form.save()
             messages.success(request, 'Equipamento atualizado com sucesso.')
             return redirect('equipment_detail', pk=eq.pk)
         else:
             messages.error(request, 'Corrija os erros no formulário.')
     else:
-        form = EquipmentForm(instance=eq) if hasattr(Equipment, 'objects') else EquipmentForm(initial={
-            'name': eq.name, 'brand': eq.brand, 'model': eq.model,
-            'serial_number': eq.serial_number, 'condition': eq.condition,
-            'environment': getattr(eq.environment, 'pk', None) or getattr(eq.environment, 'name', '')
-        })
+        form = EquipmentForm(instance=eq)
     return render(request, 'equipment_form.html', {'form': form, 'equipment': eq})
 
 
+@require_get_or_post
 @login_required
 def equipment_delete(request, pk):
     """
@@ -368,7 +396,8 @@ def equipment_delete(request, pk):
     Retorna:
     - HttpResponse com o template 'confirm_delete.html'.
     """
-    eq = get_object_or_404(Equipment, pk=pk)
+    # __str__ (exibido na confirmação) usa o nome do ambiente
+    eq = get_object_or_404(Equipment.objects.select_related('environment'), pk=pk)
     if not (request.user.is_staff or request.user.has_perm('app.delete_equipment')):
         messages.error(request, 'Permissão negada.')
         return redirect('equipment_detail', pk=pk)
@@ -398,32 +427,27 @@ def environment_request_create(request, pk):
         messages.error(request, 'Administradores não podem solicitar uso; gerencie via painel.')
         return redirect('environment_detail', pk=pk)
 
-    # previne pedidos duplicados pendentes do mesmo usuário para o mesmo ambiente
-    if EnvironmentRequest.objects.filter(environment=env, user=request.user, status='pending').exists():
+    if request.method == 'GET' and EnvironmentRequest.objects.filter(
+        environment=env, user=request.user, status='pending'
+    ).exists():
+        # avisa antes de o usuário preencher um formulário que não seria salvo
         messages.info(request, 'Você já tem um pedido pendente para este ambiente.')
         return redirect('environment_detail', pk=pk)
 
     if request.method == 'POST':
-        form = EnvironmentRequestForm(request.POST)
+        # instância já ligada ao environment e user; o form preenche data/observação
+        form = EnvironmentRequestForm(
+            request.POST,
+            instance=EnvironmentRequest(environment=env, user=request.user, status='pending'),
+        )
         if form.is_valid():
-            if isinstance(form, EnvironmentRequestForm) and hasattr(form, 'save') and getattr(form.Meta, 'model', None) is not None:
-                # ModelForm: cria instância ligada ao environment e user
-                req = form.save(commit=False)
-                req.environment = env
-                req.user = request.user
-                req.status = 'pending'
-                req.save()
+            # pedidos pendentes duplicados são barrados pelo banco (uniq_pending_request),
+            # sem SELECT prévio no POST; nesse caso o form marca duplicate
+            form.save()
+            if form.duplicate:
+                messages.info(request, 'Você já tem um pedido pendente para este ambiente; os dados informados não foram salvos.')
             else:
-                # fallback: formulário sem ModelForm
-                data = form.cleaned_data
-                req = EnvironmentRequest.objects.create(
-                    environment=env,
-                    user=request.user,
-                    request_for_date=data.get('request_for_date'),
-                    note=data.get('note',''),
-                    status='pending'
-                )
-            messages.success(request, 'Pedido enviado com sucesso. Aguarde aprovação do administrador.')
+                messages.success(request, 'Pedido enviado com sucesso. Aguarde aprovação do administrador.')
             return redirect('environment_detail', pk=pk)
         else:
             messages.error(request, 'Corrija os erros no formulário.')
@@ -59,13 +59,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # templates compilados uma vez por processo (sem busca em disco a
+            # cada render); o autoreload do runserver limpa este cache
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -80,10 +87,21 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # conexões persistentes: reaproveita a conexão entre requisições do
+        # mesmo worker por até 60 s, verificando-a antes do reuso
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
 
+# Autenticação: mesmo comportamento do ModelBackend, carregando o Profile junto.
+# Sessões abertas com o ModelBackend: migrar com `manage.py migrate_session_backend`
+AUTHENTICATION_BACKENDS = [
+    'app.backends.ProfileModelBackend',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -134,6 +152,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Sessões: leitura pelo cache (cai no banco se não estiver em cache)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Mensagens (messages.success/error) ficam em cookie, sem gravar na sessão
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 # Configurações de login
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/environments/'
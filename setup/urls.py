@@ -18,6 +18,21 @@ from django.contrib import admin
 from django.urls import path, include
 from app import views as app_views
 
+# rotas por objeto agrupadas sob o prefixo '<int:pk>/': o resolver casa o pk
+# uma vez e só então testa os sufixos (os nomes das URLs não mudam)
+environment_patterns = [
+    path('', app_views.environment_detail, name='environment_detail'),
+    path('edit/', app_views.environment_update, name='environment_update'),
+    path('delete/', app_views.environment_delete, name='environment_delete'),
+    path('request/', app_views.environment_request_create, name='environment_request_create'),
+]
+
+equipment_patterns = [
+    path('', app_views.equipment_detail, name='equipment_detail'),
+    path('edit/', app_views.equipment_update, name='equipment_update'),
+    path('delete/', app_views.equipment_delete, name='equipment_delete'),
+]
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
@@ -28,17 +43,12 @@ urlpatterns = [
     # ambientes
     path('environments/', app_views.environment_list, name='environment_list'),
     path('environments/create/', app_views.environment_create, name='environment_create'),
-    path('environments/<int:pk>/', app_views.environment_detail, name='environment_detail'),
-    path('environments/<int:pk>/edit/', app_views.environment_update, name='environment_update'),
-    path('environments/<int:pk>/delete/', app_views.environment_delete, name='environment_delete'),
-    path('environments/<int:pk>/request/', app_views.environment_request_create, name='environment_request_create'),
+    path('environments/<int:pk>/', include(environment_patterns)),
 
     # equipamentos
     path('equipments/', app_views.equipment_list, name='equipment_list'),
     path('equipments/create/', app_views.equipment_create, name='equipment_create'),
-    path('equipments/<int:pk>/', app_views.equipment_detail, name='equipment_detail'),
-    path('equipments/<int:pk>/edit/', app_views.equipment_update, name='equipment_update'),
-    path('equipments/<int:pk>/delete/', app_views.equipment_delete, name='equipment_delete'),
+    path('equipments/<int:pk>/', include(equipment_patterns)),
     # inclui as views de autenticação padrão (login/logout/password management)
     path('accounts/', include('django.contrib.auth.urls')),
 